@@ -4,6 +4,7 @@ import tables
 import librosa
 import numpy as np
 from pathlib import Path
+from contextlib import nullcontext
 from ketos.data_handling.data_feeding import BatchGenerator
 from matplotlib import pyplot as plt
 from deepechoes.constants import IMG_HEIGHT, IMG_WIDTH, OUTPUT_CHANNELS
@@ -42,21 +43,28 @@ def gans_train(hdf5_db, train_table="/train", epochs=20, batch_size=32, output_f
         # the checkpoint frequency cant be greater than the number of epochs
         checkpoints = min(checkpoints, epochs)
     
-    generator = DcgansGenerator(apply_norm=True, norm_type='batch')
-    # generator = UnetGenerator()
-    discriminator = DcgansDiscriminator(apply_norm=True, norm_type='batch', phase_shift=1)
-    generator_optimizer = tf.keras.optimizers.Adam(0.0001, beta_1=0.5)
-    discriminator_optimizer = tf.keras.optimizers.Adam(0.0001, beta_1=0.5)
-    
-    match gan_type:
-        case 'dcgan':
-            gan = DCGAN(generator, discriminator, generator_optimizer, discriminator_optimizer, loss_fn=loss)
-        case 'wgan':
-            gan = WGAN(generator, discriminator, generator_optimizer, discriminator_optimizer, loss_fn=loss)
-        case 'ssgan':
-            gan = SSGAN(generator, discriminator, generator_optimizer, discriminator_optimizer, loss_fn=loss)
-        case _:
-            raise ValueError("Unsupported loss type")
+    # Mirror the models across all local GPUs when more than one is available
+    strategy = None
+    if len(tf.config.list_physical_devices('GPU')) > 1:
+        strategy = tf.distribute.MirroredStrategy()
+        print(f'Training on {strategy.num_replicas_in_sync} GPUs')
+
+    with strategy.scope() if strategy is not None else nullcontext():
+        generator = DcgansGenerator(apply_norm=True, norm_type='batch')
+        # generator = UnetGenerator()
+        discriminator = DcgansDiscriminator(apply_norm=True, norm_type='batch', phase_shift=1)
+        generator_optimizer = tf.keras.optimizers.Adam(0.0001, beta_1=0.5)
+        discriminator_optimizer = tf.keras.optimizers.Adam(0.0001, beta_1=0.5)
+
+        match gan_type:
+            case 'dcgan':
+                gan = DCGAN(generator, discriminator, generator_optimizer, discriminator_optimizer, loss_fn=loss, strategy=strategy)
+            case 'wgan':
+                gan = WGAN(generator, discriminator, generator_optimizer, discriminator_optimizer, loss_fn=loss, strategy=strategy)
+            case 'ssgan':
+                gan = SSGAN(generator, discriminator, generator_optimizer, discriminator_optimizer, loss_fn=loss, strategy=strategy)
+            case _:
+                raise ValueError("Unsupported loss type")
 
     gan.log_dir = output_folder
     gan.checkpoint_dir = output_folder / 'checkpoints'  
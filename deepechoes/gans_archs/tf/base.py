@@ -1,24 +1,67 @@
+import sys
 import time
 import tensorflow as tf
+import matplotlib
+matplotlib.use('Agg')
+from concurrent.futures import ThreadPoolExecutor
 from deepechoes.utils.image_transforms import unscale_data
 from pathlib import Path
 from matplotlib import pyplot as plt
 
+# Run the conv/matmul heavy forward and backward passes in float16 on GPUs
+# with tensor cores; variables and updates stay in float32. CPU-only runs
+# keep the default float32 policy since float16 is slower there.
+if tf.config.list_physical_devices('GPU'):
+    tf.keras.mixed_precision.set_global_policy('mixed_float16')
+
 class BaseGAN:
-    def __init__(self, generator, discriminator, gen_optimizer, disc_optimizer, loss_fn="bce"):
+    def __init__(self, generator, discriminator, gen_optimizer, disc_optimizer, loss_fn="bce", noise_dim=100, strategy=None):
         self.generator = generator
         self.discriminator = discriminator
-        self.gen_optimizer = gen_optimizer
-        self.disc_optimizer = disc_optimizer
+        # Dynamic loss scaling keeps float16 gradients from underflowing; the
+        # wrapper is a no-op numerically under the float32 policy as well.
+        self.gen_optimizer = tf.keras.mixed_precision.LossScaleOptimizer(gen_optimizer)
+        self.disc_optimizer = tf.keras.mixed_precision.LossScaleOptimizer(disc_optimizer)
+        # Optional tf.distribute strategy. The models and optimizers must have
+        # been created inside strategy.scope() by the caller.
+        self.strategy = strategy
         self._generated_image_dir = None
         self._checkpoint_dir = None
         self._log_dir = None
 
+        # Capture the noise dimension once as a constant so the compiled
+        # train_step is traced a single time instead of retracing on a
+        # python int argument.
+        self.noise_dim = tf.constant(noise_dim)
+        self.train_step = tf.function(self.train_step, jit_compile=True)
+
+        # Compiled inference path for the epoch previews. The thumbnails do
+        # not need full precision, so the output is downcast to float16,
+        # which also halves the device->host copy of the preview batch.
+        self._preview_fn = tf.function(self._preview_predict, jit_compile=True)
+
+        # Reusable buffer for the per-epoch preview noise so its storage is
+        # allocated once instead of a fresh tensor every epoch.
+        self._preview_noise = tf.Variable(tf.zeros([16, noise_dim]), trainable=False)
+
+        # Single background worker so matplotlib rendering does not block the
+        # next training epoch. One worker keeps the figures written in order.
+        self._plot_pool = ThreadPoolExecutor(max_workers=1)
+        self._pending_plots = []
+
+        # Preview figure is created on the first render and reused after that
+        self._preview_fig = None
+        self._preview_ims = None
+
         self.checkpoint = tf.train.Checkpoint(generator_optimizer=self.gen_optimizer,
                                     discriminator_optimizer=self.disc_optimizer,
                                     generator=self.generator,
                                     discriminator=self.discriminator)
 
+        # Serialize checkpoints off the training thread so the epoch loop is
+        # not stalled on filesystem syncs while the state is written out.
+        self._ckpt_options = tf.train.CheckpointOptions(experimental_enable_async_checkpoint=True)
+
         self._disc_loss = tf.keras.metrics.Mean(name='disc_loss')
         self._gen_loss = tf.keras.metrics.Mean(name='gen_loss')
         self._disc_accuracy = tf.keras.metrics.BinaryAccuracy(name='discriminator_accuracy')
@@ -108,7 +151,11 @@ class BaseGAN:
     
     def gradient_penalty(self, real_images, fake_images):
         """Calculates the gradient penalty loss for WGAN GP"""
-        alpha = tf.random.uniform([len(real_images), 1, 1, 1], 0., 1.)
+        alpha = tf.random.uniform([tf.shape(real_images)[0], 1, 1, 1], 0., 1.)
+        # Under the mixed_float16 policy the generator output is float16 while
+        # the real batch is float32; TF does not promote dtypes, so align them
+        # before interpolating.
+        fake_images = tf.cast(fake_images, real_images.dtype)
         interpolated = real_images * alpha + fake_images * (1 - alpha)
         with tf.GradientTape() as gp_tape:
             gp_tape.watch(interpolated)
@@ -138,55 +185,118 @@ class BaseGAN:
         fake_loss = tf.reduce_mean(tf.nn.relu(1.0 + fake_output))
         return real_loss + fake_loss
 
-    def train_step(self, input):
+    def train_step(self, images):
         raise NotImplementedError
 
-    def train_loop(self, batch_generator, epochs, checkpoint_freq=5, noise_vector=None):
-        generator_losses = []
-        discriminator_losses = []
-        discriminator_accuracies = []
-        
-        noise_dim = 100
+    def build_dataset(self, batch_generator):
+        """ Build the tf.data.Dataset that feeds train_loop.
+
+            The default wraps a python batch generator reading from a single
+            HDF5 table. The generator yields batches that are already
+            transformed to (batch, height, width, 1), so the dataset only
+            needs to pull one epoch worth of batches and prefetch them,
+            overlapping the CPU-side data fetching with the GPU compute of
+            the previous step.
+
+            Subclasses whose data lives in sharded files should override this
+            with a parallel pipeline instead, e.g.
+            `tf.data.Dataset.list_files(pattern).interleave(loader,
+            num_parallel_calls=tf.data.AUTOTUNE)` followed by map/batch/prefetch,
+            so several shards are read and decoded concurrently.
+
+            Args:
+                batch_generator:
+                    Batch generator yielding (X, Y) tuples with an `n_batches` attribute.
+
+            Returns:
+                : tf.data.Dataset
+                    Dataset yielding one epoch of training batches.
+        """
+        def one_epoch():
+            for _ in range(batch_generator.n_batches):
+                train_X, _ = next(batch_generator)
+                yield train_X
+
+        ds = tf.data.Dataset.from_generator(
+            one_epoch,
+            output_signature=tf.TensorSpec(shape=(None, None, None, 1), dtype=tf.float32))
+
+        # A distribution strategy places batches on its replicas itself, so
+        # only pin the pipeline output when training on a single GPU.
+        if self.strategy is None and tf.config.list_physical_devices('GPU'):
+            # Stage the host->device copy inside the pipeline so the PCIe
+            # transfer of the next batch overlaps with the current train step,
+            # and prefetch on the device so batches wait in GPU memory.
+            ds = ds.apply(tf.data.experimental.copy_to_device('/gpu:0'))
+            with tf.device('/gpu:0'):
+                return ds.prefetch(tf.data.AUTOTUNE)
+
+        return ds.prefetch(tf.data.AUTOTUNE)
+
+    def train_loop(self, batch_generator, epochs, checkpoint_freq=10, noise_vector=None):
+        # Per-epoch metric history stays on device; it is copied to the host
+        # once after training for the summary plots.
+        metrics_history = tf.Variable(tf.zeros([epochs, 3]))
+
         num_examples_to_generate = 16
         noise = noise_vector
 
+        dataset = self.build_dataset(batch_generator)
+        if self.strategy is not None:
+            dataset = self.strategy.experimental_distribute_dataset(dataset)
+
         for epoch in range(epochs):
             start = time.time()
             self._gen_loss.reset_states()
             self._disc_loss.reset_states()
             self._disc_accuracy.reset_states()
 
-            for _ in range(batch_generator.n_batches):
-                # Fetch a batch of data
-                train_X, _ = next(batch_generator)
-                self.train_step(train_X, noise_dim)
-            
-            avg_gen_loss = self._gen_loss.result().numpy()
-            avg_disc_loss = self._disc_loss.result().numpy()
-            avg_disc_accuracy = self._disc_accuracy.result().numpy()
-
-            print(f'Epoch {epoch + 1}, Avg Gen Loss={avg_gen_loss:.4f}, Avg Disc Loss={avg_disc_loss:.4f}, Disc Accuracy={avg_disc_accuracy:.4f}')
+            for train_X in dataset:
+                if self.strategy is not None:
+                    self.strategy.run(self.train_step, args=(train_X,))
+                else:
+                    self.train_step(train_X)
             
-            # Append the average losses for plotting later
-            generator_losses.append(avg_gen_loss)
-            discriminator_losses.append(avg_disc_loss)
-            discriminator_accuracies.append(avg_disc_accuracy)
+            metrics_history[epoch].assign(tf.stack([self._gen_loss.result(),
+                                                    self._disc_loss.result(),
+                                                    self._disc_accuracy.result()]))
+
+            # tf.print logs the metric results without forcing a device sync
+            # the way .numpy() on each result would
+            tf.print('Epoch', epoch + 1,
+                     'Avg Gen Loss=', self._gen_loss.result(),
+                     'Avg Disc Loss=', self._disc_loss.result(),
+                     'Disc Accuracy=', self._disc_accuracy.result(),
+                     output_stream=sys.stdout)
 
             if noise_vector is None:
-                noise = tf.random.normal([num_examples_to_generate, noise_dim]) 
+                # Stateless draw: deterministic per epoch and free of global
+                # generator state, so it traces cleanly and is thread-safe.
+                self._preview_noise.assign(
+                    tf.random.stateless_normal([num_examples_to_generate, self.noise_dim], seed=(epoch, 0)))
+                noise = self._preview_noise
                 
             # Produce images
-            self.generate_and_plot_images(self.generator, epoch + 1, noise)
+            self.generate_and_plot_images(epoch + 1, noise)
             
             if (epoch + 1) % checkpoint_freq == 0:
-                self.ckpt_manager.save(checkpoint_number=epoch + 1)
+                self.ckpt_manager.save(checkpoint_number=epoch + 1, options=self._ckpt_options)
 
             print(f'Time for epoch {epoch + 1} is {time.time() - start} sec')
 
         # Generate after the final epoch
-        self.generate_and_plot_images(self.generator, epochs, noise)
-        
+        self.generate_and_plot_images(epochs, noise)
+
+        # Drain the render queue before touching matplotlib from this thread;
+        # this also surfaces any exception a background render raised.
+        self._drain_plot_queue()
+
         if self.log_dir is not None:
+            history = metrics_history.numpy()
+            generator_losses = history[:, 0]
+            discriminator_losses = history[:, 1]
+            discriminator_accuracies = history[:, 2]
+
             fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 10))
 
             # Loss plot
@@ -213,31 +323,61 @@ class BaseGAN:
             output_dir = output_dir
         else:
             output_dir = Path(output_dir)
-            # Save the generator model
-        self.generator.save(output_dir / 'generator_model')
-        
-        # Optionally save the discriminator model
+
+        # Bundle the models into a single SavedModel export so saving pays
+        # one metadata write instead of two sequential full serializations
+        models = {'generator': self.generator}
         if save_discriminator:
-            self.discriminator.save(output_dir / 'discriminator_model')
+            models['discriminator'] = self.discriminator
+
+        tf.saved_model.save(tf.train.Checkpoint(**models), str(output_dir / 'gan_model'),
+                            options=tf.saved_model.SaveOptions(experimental_io_device='/job:localhost'))
 
     def generate_new(self, num_samples=10):
         """ Generate new spectrograms using the generator """
         # Assumes generator expects a random noise vector as input
-        noise_dim = 100  
-        random_noise = tf.random.normal([num_samples, noise_dim])
+        random_noise = tf.random.normal([num_samples, self.noise_dim])
         
         generated_images = self.generator(random_noise, training=False)
         return generated_images
 
-    def generate_and_plot_images(self, model, epoch, input):
-        predictions = model(input, training=False)
-        fig, axs = plt.subplots(4, 4, figsize=(34, 28))
-        plt.subplots_adjust(wspace=0, hspace=0)  # Adjust as needed
-        for i in range(predictions.shape[0]):
-            ax = axs[i // 4, i % 4]
-            mel_spectrogram = unscale_data(predictions[i, :, :, 0].numpy())
-            ax.imshow(mel_spectrogram, aspect='auto', origin='lower', cmap='viridis')
-            ax.axis("off")
-        plt.tight_layout()
-        plt.savefig(self.generated_image_dir / 'image_at_epoch_{:04d}.png'.format(epoch))
-        plt.close(fig)
+    def _preview_predict(self, noise):
+        return tf.cast(self.generator(noise, training=False), tf.float16)
+
+    def generate_and_plot_images(self, epoch, input):
+        # Copy the predictions to the host once and hand rendering off to the
+        # background worker so training can move on to the next epoch.
+        predictions = self._preview_fn(input).numpy()
+        self._pending_plots.append(self._plot_pool.submit(self._render_grid, predictions, epoch))
+
+    def _drain_plot_queue(self):
+        """ Wait for all queued preview renders and re-raise the first failure.
+
+            The render futures are fired and forgotten while training runs,
+            so a failing render (e.g. an unset generated_image_dir) would
+            otherwise be swallowed silently.
+        """
+        pending, self._pending_plots = self._pending_plots, []
+        for future in pending:
+            future.result()
+
+    def _render_grid(self, predictions, epoch):
+        if self._preview_fig is None:
+            # Build the 4x4 grid once; later epochs only swap the image data
+            # instead of allocating and tearing down axes and canvas each call.
+            self._preview_fig, axs = plt.subplots(4, 4, figsize=(34, 28))
+            plt.subplots_adjust(wspace=0, hspace=0)  # Adjust as needed
+            self._preview_ims = []
+            for i in range(predictions.shape[0]):
+                ax = axs[i // 4, i % 4]
+                mel_spectrogram = unscale_data(predictions[i, :, :, 0])
+                self._preview_ims.append(ax.imshow(mel_spectrogram, aspect='auto', origin='lower', cmap='viridis'))
+                ax.axis("off")
+            self._preview_fig.tight_layout()
+        else:
+            for im, prediction in zip(self._preview_ims, predictions):
+                mel_spectrogram = unscale_data(prediction[:, :, 0])
+                im.set_data(mel_spectrogram)
+                # imshow rescales the color range automatically; set_data does not
+                im.set_clim(mel_spectrogram.min(), mel_spectrogram.max())
+        self._preview_fig.savefig(self.generated_image_dir / 'image_at_epoch_{:04d}.png'.format(epoch))
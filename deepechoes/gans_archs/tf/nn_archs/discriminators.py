@@ -38,8 +38,9 @@ def DcgansDiscriminator(apply_norm=True, norm_type='batch', phase_shift=0):
     model.add(dcgans_discriminator_block(256, 5, strides=2, apply_norm=apply_norm, norm_type=norm_type, phase_shift=phase_shift))  # 16x16x256
     model.add(dcgans_discriminator_block(512, 5, strides=2, apply_norm=apply_norm, norm_type=norm_type, phase_shift=phase_shift)) # 8x8x512
 
-    # Output layer
+    # Output layer. The logits stay float32 under mixed precision so the
+    # losses are computed in float32 and loss scaling cannot overflow float16
     model.add(tf.keras.layers.Flatten())
-    model.add(tf.keras.layers.Dense(1))
+    model.add(tf.keras.layers.Dense(1, dtype='float32'))
     
     return model
@@ -60,11 +60,14 @@ def UnetGenerator():
     ]
 
     initializer = tf.random_normal_initializer(0., 0.02)
+    # Output layer stays float32 under mixed precision so the tensors fed to
+    # the losses do not overflow float16 once loss scaling is applied
     last = tf.keras.layers.Conv2DTranspose(OUTPUT_CHANNELS, 4,
                                             strides=2,
                                             padding='same',
                                             kernel_initializer=initializer,
-                                            activation='tanh')  # (batch_size, 256, 256, 1)
+                                            activation='tanh',
+                                            dtype='float32')  # (batch_size, 256, 256, 1)
 
     x = inputs
 
@@ -122,7 +125,9 @@ def DcgansGenerator(input_shape=100, apply_norm=True, norm_type='batch'):
         model.add(block)
     
     initializer = tf.random_normal_initializer(0., 0.02)
-    model.add(tf.keras.layers.Conv2DTranspose(1, (5, 5), strides=(2, 2), padding='same', use_bias=False, kernel_initializer=initializer, activation='tanh'))
+    # Output layer stays float32 under mixed precision so the tensors fed to
+    # the losses do not overflow float16 once loss scaling is applied
+    model.add(tf.keras.layers.Conv2DTranspose(1, (5, 5), strides=(2, 2), padding='same', use_bias=False, kernel_initializer=initializer, activation='tanh', dtype='float32'))
 
     return model
 
@@ -10,12 +10,13 @@ class SSGAN(BaseGAN):
 
     
     def rotation_loss(true_rotations, rotation_pred):
-        loss = tf.keras.losses.sparse_categorical_crossentropy(true_rotations, rotation_pred, from_logits=True)
+        # The rotation head comes from user-supplied discriminators, which may
+        # emit float16 under mixed precision; compute the loss in float32.
+        loss = tf.keras.losses.sparse_categorical_crossentropy(true_rotations, tf.cast(rotation_pred, tf.float32), from_logits=True)
         return tf.reduce_mean(loss)
 
-    @tf.function
-    def train_step(self, images, noise_dim):
-        noise = tf.random.normal([len(images), noise_dim])
+    def train_step(self, images):
+        noise = tf.random.normal([tf.shape(images)[0], self.noise_dim])
 
         # Rotate images and generate labels for rotations. Every image will generate 4. So a 32,4,4,1 spectrogram will become 32*4,4,4,1
         rotated_images_real, rotation_labels_real = rotate_images_and_labels(images)
@@ -43,13 +44,19 @@ class SSGAN(BaseGAN):
             disc_loss_total = disc_loss + self.disc_weight_rotation_loss * rotation_loss_real
             gen_total_loss = gen_loss + self.gen_weight_rotation_loss * rotation_loss_fake
 
+            # Scale the losses inside the tape so float16 gradients do not underflow
+            scaled_gen_loss = self.gen_optimizer.get_scaled_loss(gen_total_loss)
+            scaled_disc_loss = self.disc_optimizer.get_scaled_loss(disc_loss_total)
+
         real_labels = tf.ones_like(real_output)
         fake_labels = tf.zeros_like(fake_output)
         self._disc_accuracy.update_state(real_labels, real_output)
         self._disc_accuracy.update_state(fake_labels, fake_output)
 
-        gradients_of_generator = gen_tape.gradient(gen_total_loss, self.generator.trainable_variables)
-        gradients_of_discriminator = disc_tape.gradient(disc_loss_total, self.discriminator.trainable_variables)
+        gradients_of_generator = self.gen_optimizer.get_unscaled_gradients(
+            gen_tape.gradient(scaled_gen_loss, self.generator.trainable_variables))
+        gradients_of_discriminator = self.disc_optimizer.get_unscaled_gradients(
+            disc_tape.gradient(scaled_disc_loss, self.discriminator.trainable_variables))
 
         self.gen_optimizer.apply_gradients(zip(gradients_of_generator, self.generator.trainable_variables))
         self.disc_optimizer.apply_gradients(zip(gradients_of_discriminator, self.discriminator.trainable_variables))
@@ -5,9 +5,8 @@ class WGAN(BaseGAN):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
     
-    @tf.function
-    def train_step(self, images, noise_dim):
-        noise = tf.random.normal([len(images), noise_dim])
+    def train_step(self, images):
+        noise = tf.random.normal([tf.shape(images)[0], self.noise_dim])
 
         with tf.GradientTape() as gen_tape, tf.GradientTape() as disc_tape:
             generated_images = self.generator(noise, training=True)
@@ -19,13 +18,19 @@ class WGAN(BaseGAN):
             gen_loss = self.generator_loss(fake_output)
             disc_loss = self.discriminator_loss(real_output, fake_output, gp)
 
+            # Scale the losses inside the tape so float16 gradients do not underflow
+            scaled_gen_loss = self.gen_optimizer.get_scaled_loss(gen_loss)
+            scaled_disc_loss = self.disc_optimizer.get_scaled_loss(disc_loss)
+
         real_labels = tf.ones_like(real_output)
         fake_labels = tf.zeros_like(fake_output)
         self._disc_accuracy.update_state(real_labels, real_output)
         self._disc_accuracy.update_state(fake_labels, fake_output)
 
-        gradients_of_generator = gen_tape.gradient(gen_loss, self.generator.trainable_variables)
-        gradients_of_discriminator = disc_tape.gradient(disc_loss, self.discriminator.trainable_variables)
+        gradients_of_generator = self.gen_optimizer.get_unscaled_gradients(
+            gen_tape.gradient(scaled_gen_loss, self.generator.trainable_variables))
+        gradients_of_discriminator = self.disc_optimizer.get_unscaled_gradients(
+            disc_tape.gradient(scaled_disc_loss, self.discriminator.trainable_variables))
 
         self.gen_optimizer.apply_gradients(zip(gradients_of_generator, self.generator.trainable_variables))
         self.disc_optimizer.apply_gradients(zip(gradients_of_discriminator, self.discriminator.trainable_variables))
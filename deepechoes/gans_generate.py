@@ -17,7 +17,12 @@ def load_generator(model_path):
     Returns:
         tf.keras.Model: The loaded generator model.
     """
-    generator = tf.keras.models.load_model(model_path)
+    try:
+        generator = tf.keras.models.load_model(model_path)
+    except (OSError, IOError, ValueError):
+        # Bundled export written by BaseGAN.save: generator and discriminator
+        # share one SavedModel, with the generator under its named attribute.
+        generator = tf.saved_model.load(model_path).generator
     print(f"Generator model loaded from {model_path}.")
     return generator
 
@@ -38,10 +43,12 @@ def generate_new_specs(generator, noise_dim=100, batch_size=100, transform=None)
     noise_dim = 100  
     random_noise = tf.random.normal([batch_size, noise_dim])
     
-    generated_images = generator(random_noise, training=False)
+    # Copy the whole batch to the host once and slice in numpy, instead of
+    # paying a separate device sync per spectrogram
+    generated_images = generator(random_noise, training=False).numpy()
     if transform:
-        return [unscale_data(generated_images[i, :, :, 0].numpy()) for i in range(batch_size)]
-    return [generated_images[i, :, :, 0].numpy() for i in range(batch_size)]
+        return [unscale_data(generated_images[i, :, :, 0]) for i in range(batch_size)]
+    return [generated_images[i, :, :, 0] for i in range(batch_size)]
 
 def plot_images(input, output_folder, batch_num):
     """
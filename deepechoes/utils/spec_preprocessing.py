@@ -1,6 +1,6 @@
 import numpy as np
 import librosa
-import skimage
+import tensorflow as tf
 from deepechoes.utils.image_transforms import scale_to_range, normalize_to_zero_mean_unit_variance
 from deepechoes.constants import IMG_HEIGHT, IMG_WIDTH
 from deepechoes.utils.spec_to_wav import spec_to_wav
@@ -36,7 +36,7 @@ def augmentation_representation_snapshot(y, window, step, sr, n_mels, fmin=400,
     S = librosa.feature.melspectrogram(y=y, sr=sr, n_fft=n_fft, hop_length=hop_length, window="hamming", n_mels=n_mels, fmin=fmin, fmax=fmax)
     spec = librosa.power_to_db(S, ref=np.max)
     
-    representation_data = skimage.transform.resize(spec, (IMG_HEIGHT,IMG_WIDTH))
+    representation_data = tf.image.resize(spec[..., tf.newaxis], (IMG_HEIGHT, IMG_WIDTH), method='bilinear')[..., 0]
     representation_data = scale_to_range(representation_data, -1, 1)
 
-    return representation_data
\ No newline at end of file
+    return representation_data.numpy()
\ No newline at end of file